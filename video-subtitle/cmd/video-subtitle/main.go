@@ -3,39 +3,49 @@ package main
 import (
 	"bytes"
 	"context"
+	"encoding/csv"
 	"encoding/json"
 	"errors"
 	"flag"
 	"fmt"
 	"io"
+	"math"
 	"mime/multipart"
 	"net"
 	"net/http"
 	"os"
 	"os/exec"
 	"path/filepath"
+	"regexp"
 	"runtime"
 	"strconv"
 	"strings"
 	"sync"
 	"time"
 	"unicode"
+	"unicode/utf8"
 )
 
 const (
-	defaultWhisperModel     = "whisper-1"
-	defaultTranslateModel   = "gpt-4o-mini"
-	defaultSourceLang       = "ja"
-	defaultTargetLang       = "zh-TW"
-	defaultChunkSeconds     = 600
-	defaultMaxAudioMB       = 24
-	defaultTranslateWorkers = 4
-	defaultTimeoutSeconds   = 900
-	maxRetries              = 4
-	baseRetryDelay          = 1 * time.Second
-	maxRetryDelay           = 20 * time.Second
+	defaultWhisperModel      = "whisper-1"
+	defaultTranslateModel    = "gpt-4o-mini"
+	defaultSourceLang        = "ja"
+	defaultTargetLang        = "zh-TW"
+	defaultChunkSeconds      = 600
+	defaultMaxAudioMB        = 24
+	whisperUploadLimitBytes  = 25 * 1024 * 1024
+	chunkFillRatio           = 0.9
+	defaultTranslateWorkers  = 4
+	defaultTranscribeWorkers = 4
+	defaultTranslateBatch    = 40
+	defaultTimeoutSeconds    = 900
+	maxRetries               = 4
+	baseRetryDelay           = 1 * time.Second
+	maxRetryDelay            = 20 * time.Second
 )
 
+// Segment is one timed line of transcript. Text is trimmed once when the
+// segment is created, so later stages can use it as-is.
 type Segment struct {
 	Start float64
 	End   float64
@@ -70,11 +80,18 @@ func newOpenAIClient(apiKey string, timeout time.Duration) *openAIClient {
 	if timeout <= 0 {
 		timeout = time.Duration(defaultTimeoutSeconds) * time.Second
 	}
+	// HTTP/2 endpoints multiplex on one connection anyway, but over HTTP/1.1
+	// (e.g. a proxy set via OPENAI_BASE_URL) the default pool of two idle
+	// connections per host makes concurrent workers re-dial and re-handshake.
+	transport := http.DefaultTransport.(*http.Transport).Clone()
+	transport.MaxIdleConns = 128
+	transport.MaxIdleConnsPerHost = 64
 	return &openAIClient{
 		apiKey:  apiKey,
 		baseURL: baseURL,
 		httpClient: &http.Client{
-			Timeout: timeout,
+			Timeout:   timeout,
+			Transport: transport,
 		},
 	}
 }
@@ -126,7 +143,25 @@ func (c *openAIClient) do(req *http.Request) ([]byte, error) {
 	return body, nil
 }
 
-func (c *openAIClient) Transcribe(ctx context.Context, audioPath, model, language string) ([]Segment, error) {
+// audioInput is audio to upload, held either in memory or in a file on disk.
+type audioInput struct {
+	Name string
+	Path string
+	Data []byte
+}
+
+func audioFile(path string) audioInput {
+	return audioInput{Name: filepath.Base(path), Path: path}
+}
+
+func (a audioInput) open() (io.ReadCloser, error) {
+	if a.Data != nil {
+		return io.NopCloser(bytes.NewReader(a.Data)), nil
+	}
+	return os.Open(a.Path)
+}
+
+func (c *openAIClient) Transcribe(ctx context.Context, audio audioInput, model, language string) ([]Segment, error) {
 	var buf bytes.Buffer
 	writer := multipart.NewWriter(&buf)
 
@@ -145,13 +180,13 @@ func (c *openAIClient) Transcribe(ctx context.Context, audioPath, model, languag
 		return nil, err
 	}
 
-	file, err := os.Open(audioPath)
+	file, err := audio.open()
 	if err != nil {
 		return nil, err
 	}
 	defer file.Close()
 
-	part, err := writer.CreateFormFile("file", filepath.Base(audioPath))
+	part, err := writer.CreateFormFile("file", audio.Name)
 	if err != nil {
 		return nil, err
 	}
@@ -184,24 +219,52 @@ func (c *openAIClient) Transcribe(ctx context.Context, audioPath, model, languag
 		segments = append(segments, Segment{
 			Start: seg.Start,
 			End:   seg.End,
-			Text:  seg.Text,
+			Text:  strings.TrimSpace(seg.Text),
 		})
 	}
-	if len(segments) == 0 && strings.TrimSpace(resp.Text) != "" {
-		segments = append(segments, Segment{Start: 0, End: 0, Text: resp.Text})
+	if text := strings.TrimSpace(resp.Text); len(segments) == 0 && text != "" {
+		segments = append(segments, Segment{Start: 0, End: 0, Text: text})
 	}
 	return segments, nil
 }
 
+// Translation prompts keep everything that is fixed for a run at the front
+// and the per-request parts (the batch line count and the segment text) at
+// the end, so consecutive requests share a byte-identical prefix.
+const (
+	translateSystemPrompt      = "You are a precise translator. Return only the translation."
+	translateUserPrompt        = "Translate the following text from %s to %s. Preserve punctuation and line breaks.\n\n"
+	batchTranslateSystemPrompt = "You are a precise translator. The input is numbered lines in the form \"N. text\". Reply with exactly one translated line per input line, in the same numbered format, with no commentary."
+	batchTranslateUserPrompt   = "Translate each numbered line from %s to %s. Preserve punctuation and keep the numbering.\n\n"
+	batchTranslateCountPrompt  = "(%d lines)\n"
+)
+
 func (c *openAIClient) Translate(ctx context.Context, model, sourceLang, targetLang, text string) (string, error) {
-	systemPrompt := "You are a precise translator. Return only the translation."
-	userPrompt := fmt.Sprintf(
-		"Translate the following text from %s to %s. Preserve punctuation and line breaks.\n\n%s",
-		sourceLang,
-		targetLang,
-		text,
-	)
+	userPrompt := fmt.Sprintf(translateUserPrompt, sourceLang, targetLang) + text
+	return c.chat(ctx, model, translateSystemPrompt, userPrompt)
+}
+
+// TranslateBatch translates several lines in one request using a numbered-line
+// protocol. It returns errBatchMismatch when the reply cannot be mapped back
+// onto the input lines.
+func (c *openAIClient) TranslateBatch(ctx context.Context, model, sourceLang, targetLang string, texts []string) ([]string, error) {
+	var userPrompt strings.Builder
+	fmt.Fprintf(&userPrompt, batchTranslateUserPrompt, sourceLang, targetLang)
+	fmt.Fprintf(&userPrompt, batchTranslateCountPrompt, len(texts))
+	for i, text := range texts {
+		userPrompt.WriteString(strconv.Itoa(i + 1))
+		userPrompt.WriteString(". ")
+		userPrompt.WriteString(strings.Join(strings.Fields(text), " "))
+		userPrompt.WriteString("\n")
+	}
+	content, err := c.chat(ctx, model, batchTranslateSystemPrompt, userPrompt.String())
+	if err != nil {
+		return nil, err
+	}
+	return parseNumberedLines(content, len(texts))
+}
 
+func (c *openAIClient) chat(ctx context.Context, model, systemPrompt, userPrompt string) (string, error) {
 	payload := map[string]any{
 		"model": model,
 		"messages": []map[string]string{
@@ -236,6 +299,29 @@ func (c *openAIClient) Translate(ctx context.Context, model, sourceLang, targetL
 	return strings.TrimSpace(resp.Choices[0].Message.Content), nil
 }
 
+var (
+	errBatchMismatch = errors.New("batch translation returned mismatched lines")
+	// Horizontal whitespace only, so a match never spills onto the next
+	// line, and the text must be non-blank.
+	numberedLineRe = regexp.MustCompile(`(?m)^[ \t]*(\d+)\.[ \t]*(\S.*?)[ \t\r]*$`)
+)
+
+func parseNumberedLines(content string, count int) ([]string, error) {
+	matches := numberedLineRe.FindAllStringSubmatch(content, -1)
+	if len(matches) != count {
+		return nil, errBatchMismatch
+	}
+	lines := make([]string, count)
+	for _, match := range matches {
+		number, err := strconv.Atoi(match[1])
+		if err != nil || number < 1 || number > count || lines[number-1] != "" || match[2] == "" {
+			return nil, errBatchMismatch
+		}
+		lines[number-1] = match[2]
+	}
+	return lines, nil
+}
+
 func parseAPIError(statusCode int, body []byte) error {
 	var resp openAIErrorResponse
 	if err := json.Unmarshal(body, &resp); err == nil && resp.Error.Message != "" {
@@ -297,16 +383,95 @@ func retry(
 		if onRetry != nil {
 			onRetry(attempt+1, delay, err)
 		}
-		timer := time.NewTimer(delay)
-		select {
-		case <-ctx.Done():
-			timer.Stop()
-			return ctx.Err()
-		case <-timer.C:
+		if err := sleepCtx(ctx, delay); err != nil {
+			return err
+		}
+	}
+}
+
+type jobSlotKey struct{}
+
+// sleepCtx waits for delay or until ctx is done. When ctx belongs to a
+// jobGroup job, the job's slot is handed back for the duration of the wait so
+// a backed-off job does not keep other work from starting.
+func sleepCtx(ctx context.Context, delay time.Duration) error {
+	if sem, ok := ctx.Value(jobSlotKey{}).(chan struct{}); ok {
+		<-sem
+		defer func() { sem <- struct{}{} }()
+	}
+	timer := time.NewTimer(delay)
+	defer timer.Stop()
+	select {
+	case <-ctx.Done():
+		return ctx.Err()
+	case <-timer.C:
+		return nil
+	}
+}
+
+// tokenBucket throttles callers to an approximate number of tokens per
+// minute so concurrent workers do not burst past the account's TPM limit.
+type tokenBucket struct {
+	mu       sync.Mutex
+	capacity float64
+	tokens   float64
+	perSec   float64
+	last     time.Time
+}
+
+func newTokenBucket(perMinute int) *tokenBucket {
+	if perMinute <= 0 {
+		return nil
+	}
+	return &tokenBucket{
+		capacity: float64(perMinute),
+		tokens:   float64(perMinute),
+		perSec:   float64(perMinute) / 60,
+		last:     time.Now(),
+	}
+}
+
+// Wait blocks until n tokens are available. A nil bucket never blocks.
+func (b *tokenBucket) Wait(ctx context.Context, n int) error {
+	if b == nil {
+		return nil
+	}
+	need := float64(n)
+	if need > b.capacity {
+		need = b.capacity
+	}
+	for {
+		b.mu.Lock()
+		now := time.Now()
+		b.tokens += now.Sub(b.last).Seconds() * b.perSec
+		if b.tokens > b.capacity {
+			b.tokens = b.capacity
+		}
+		b.last = now
+		if b.tokens >= need {
+			b.tokens -= need
+			b.mu.Unlock()
+			return nil
+		}
+		delay := time.Duration((need - b.tokens) / b.perSec * float64(time.Second))
+		b.mu.Unlock()
+
+		if err := sleepCtx(ctx, delay); err != nil {
+			return err
 		}
 	}
 }
 
+// estimateTokens roughly sizes a translation request: one token per rune for
+// the prompt, as much again for the reply, plus the fixed instructions.
+func estimateTokens(texts ...string) int {
+	total := 64
+	for _, text := range texts {
+		total += 2 * utf8.RuneCountInString(text)
+	}
+	return total
+}
+
 func randFloat() float64 {
 	return float64(time.Now().UnixNano()%1000) / 1000.0
 }
@@ -372,114 +537,353 @@ func isLowInfoText(text string, minChars int) bool {
 	return informativeRuneCount(trimmed) < minChars
 }
 
-func countTranslatableSegments(segments []Segment, minChars int) int {
+// languageScripts maps a language tag to the scripts its text is written in.
+// Tags not listed are assumed to use Latin script.
+func languageScripts(lang string) []*unicode.RangeTable {
+	primary := strings.ToLower(lang)
+	if i := strings.IndexAny(primary, "-_"); i >= 0 {
+		primary = primary[:i]
+	}
+	switch primary {
+	case "ja":
+		return []*unicode.RangeTable{unicode.Han, unicode.Hiragana, unicode.Katakana}
+	case "zh":
+		return []*unicode.RangeTable{unicode.Han}
+	case "ko":
+		return []*unicode.RangeTable{unicode.Hangul, unicode.Han}
+	case "ru", "uk", "be", "bg", "sr", "mk", "kk":
+		return []*unicode.RangeTable{unicode.Cyrillic}
+	case "el":
+		return []*unicode.RangeTable{unicode.Greek}
+	case "ar", "fa", "ur":
+		return []*unicode.RangeTable{unicode.Arabic}
+	case "he", "yi":
+		return []*unicode.RangeTable{unicode.Hebrew}
+	case "th":
+		return []*unicode.RangeTable{unicode.Thai}
+	case "hi", "mr", "ne":
+		return []*unicode.RangeTable{unicode.Devanagari}
+	default:
+		return []*unicode.RangeTable{unicode.Latin}
+	}
+}
+
+// isAlreadyTarget reports whether text needs no translation: it has no
+// letters at all, or every letter belongs to a script only the target
+// language uses (for example English loanwords in a Japanese transcript
+// translated to English). Scripts shared by both languages, such as Han for
+// ja and zh, never count as already translated.
+func isAlreadyTarget(text, sourceLang, targetLang string) bool {
+	sourceScripts := languageScripts(sourceLang)
+	targetScripts := languageScripts(targetLang)
+	for _, r := range text {
+		if !unicode.IsLetter(r) {
+			continue
+		}
+		if unicode.In(r, sourceScripts...) || !unicode.In(r, targetScripts...) {
+			return false
+		}
+	}
+	return true
+}
+
+// needsTranslation reports whether text should be sent for translation. With
+// minChars <= 0 (--high-accuracy or --min-translate-chars 0) every non-blank
+// segment is translated, including ones already in the target script.
+func needsTranslation(text string, minChars int, sourceLang, targetLang string) bool {
+	if isLowInfoText(text, minChars) {
+		return false
+	}
+	return minChars <= 0 || !isAlreadyTarget(text, sourceLang, targetLang)
+}
+
+func countTranslatableSegments(segments []Segment, minChars int, sourceLang, targetLang string) int {
 	total := 0
 	for _, seg := range segments {
-		if !isLowInfoText(seg.Text, minChars) {
+		if needsTranslation(seg.Text, minChars, sourceLang, targetLang) {
 			total++
 		}
 	}
 	return total
 }
 
-func formatSRTTimestamp(seconds float64) string {
-	millis := int64(seconds * 1000)
+// appendSRTTimestamp appends seconds as HH:MM:SS,mmm, rounded to the
+// nearest millisecond.
+func appendSRTTimestamp(dst []byte, seconds float64) []byte {
+	millis := int64(math.Round(seconds * 1000))
+	if millis < 0 {
+		millis = 0
+	}
 	hours := millis / 3600000
 	millis %= 3600000
 	minutes := millis / 60000
 	millis %= 60000
 	secs := millis / 1000
 	millis %= 1000
-	return fmt.Sprintf("%02d:%02d:%02d,%03d", hours, minutes, secs, millis)
+	if hours < 10 {
+		dst = append(dst, '0')
+	}
+	dst = strconv.AppendInt(dst, hours, 10)
+	dst = append(dst, ':', byte('0'+minutes/10), byte('0'+minutes%10))
+	dst = append(dst, ':', byte('0'+secs/10), byte('0'+secs%10))
+	dst = append(dst, ',', byte('0'+millis/100), byte('0'+millis/10%10), byte('0'+millis%10))
+	return dst
 }
 
 func writeSRT(segments []Segment, outputPath string) error {
-	var buf strings.Builder
+	size := 0
+	for _, seg := range segments {
+		size += len(seg.Text) + 40
+	}
+	buf := make([]byte, 0, size)
 	for idx, seg := range segments {
-		start := formatSRTTimestamp(seg.Start)
-		end := formatSRTTimestamp(seg.End)
-		buf.WriteString(strconv.Itoa(idx + 1))
-		buf.WriteString("\n")
-		buf.WriteString(start)
-		buf.WriteString(" --> ")
-		buf.WriteString(end)
-		buf.WriteString("\n")
-		buf.WriteString(strings.TrimSpace(seg.Text))
-		buf.WriteString("\n\n")
+		buf = strconv.AppendInt(buf, int64(idx+1), 10)
+		buf = append(buf, '\n')
+		buf = appendSRTTimestamp(buf, seg.Start)
+		buf = append(buf, " --> "...)
+		buf = appendSRTTimestamp(buf, seg.End)
+		buf = append(buf, '\n')
+		buf = append(buf, seg.Text...)
+		buf = append(buf, "\n\n"...)
+	}
+	return os.WriteFile(outputPath, buf, 0644)
+}
+
+// stderrTailBytes bounds how much subprocess stderr is kept for error
+// messages; ffmpeg's progress output grows with the input's duration.
+const stderrTailBytes = 64 * 1024
+
+// tailBuffer is an io.Writer that keeps only the last max bytes written.
+type tailBuffer struct {
+	max int
+	buf []byte
+}
+
+func newTailBuffer() *tailBuffer {
+	return &tailBuffer{max: stderrTailBytes}
+}
+
+func (t *tailBuffer) Write(p []byte) (int, error) {
+	t.buf = append(t.buf, p...)
+	// Trim only once the buffer has doubled so trimming stays amortized.
+	if len(t.buf) > 2*t.max {
+		t.buf = append(t.buf[:0], t.buf[len(t.buf)-t.max:]...)
 	}
-	return os.WriteFile(outputPath, []byte(buf.String()), 0644)
+	return len(p), nil
 }
 
-func runCommand(name string, args ...string) error {
-	cmd := exec.Command(name, args...)
-	var stderr bytes.Buffer
-	cmd.Stderr = &stderr
-	if err := cmd.Run(); err != nil {
-		message := strings.TrimSpace(stderr.String())
-		if message == "" {
-			message = err.Error()
-		}
-		return fmt.Errorf("%s failed: %s", name, message)
+func (t *tailBuffer) String() string {
+	if len(t.buf) > t.max {
+		return string(t.buf[len(t.buf)-t.max:])
 	}
-	return nil
+	return string(t.buf)
+}
+
+func commandError(name string, err error, stderr *tailBuffer) error {
+	message := strings.TrimSpace(stderr.String())
+	if message == "" {
+		message = err.Error()
+	}
+	return fmt.Errorf("%s failed: %s", name, message)
 }
 
 func runCommandOutput(name string, args ...string) (string, error) {
 	cmd := exec.Command(name, args...)
 	var stdout bytes.Buffer
-	var stderr bytes.Buffer
+	stderr := newTailBuffer()
 	cmd.Stdout = &stdout
-	cmd.Stderr = &stderr
+	cmd.Stderr = stderr
 	if err := cmd.Run(); err != nil {
-		message := strings.TrimSpace(stderr.String())
-		if message == "" {
-			message = err.Error()
-		}
-		return "", fmt.Errorf("%s failed: %s", name, message)
+		return "", commandError(name, err, stderr)
 	}
 	return stdout.String(), nil
 }
 
-func extractAudio(inputPath, outputPath string) error {
-	return runCommand(
-		"ffmpeg",
-		"-y",
-		"-i",
-		inputPath,
-		"-vn",
-		"-ac",
-		"1",
-		"-ar",
-		"16000",
-		"-f",
-		"wav",
-		outputPath,
-	)
+// spoolWriter buffers written bytes in memory up to limit and spills
+// everything to path once the limit is crossed. Output over the limit is
+// going to be chunked from disk anyway, so it never sits in memory whole.
+type spoolWriter struct {
+	limit int64
+	path  string
+	buf   bytes.Buffer
+	file  *os.File
+	size  int64
+}
+
+func (w *spoolWriter) Write(p []byte) (int, error) {
+	if w.file == nil && w.size+int64(len(p)) > w.limit {
+		file, err := os.Create(w.path)
+		if err != nil {
+			return 0, err
+		}
+		if _, err := file.Write(w.buf.Bytes()); err != nil {
+			file.Close()
+			return 0, err
+		}
+		w.buf = bytes.Buffer{}
+		w.file = file
+	}
+	var n int
+	var err error
+	if w.file != nil {
+		n, err = w.file.Write(p)
+	} else {
+		n, err = w.buf.Write(p)
+	}
+	w.size += int64(n)
+	return n, err
+}
+
+func (w *spoolWriter) Close() error {
+	if w.file == nil {
+		return nil
+	}
+	return w.file.Close()
+}
+
+func (w *spoolWriter) OnDisk() bool {
+	return w.file != nil
+}
+
+// audioFormat describes how extracted audio is encoded for upload. All
+// formats are downmixed to 16 kHz mono, which is what Whisper works at.
+type audioFormat struct {
+	Ext       string
+	Muxer     string
+	CodecArgs []string
+}
+
+// opusFormat is the default: 24 kbps speech-tuned Opus is about a tenth the
+// size of 16-bit PCM, so a single upload holds over two hours of audio and
+// chunking rarely triggers.
+var opusFormat = audioFormat{
+	Ext:       ".ogg",
+	Muxer:     "ogg",
+	CodecArgs: []string{"-c:a", "libopus", "-b:a", "24k", "-application", "voip"},
 }
 
-func extractAudioSegment(inputPath, outputPath string, startSeconds, durationSeconds float64, accurate bool) error {
-	args := []string{"-y"}
-	if !accurate {
-		args = append(args, "-ss", fmt.Sprintf("%.3f", startSeconds))
+// flacFormat is lossless and roughly half the size of 16-bit PCM WAV.
+var flacFormat = audioFormat{
+	Ext:       ".flac",
+	Muxer:     "flac",
+	CodecArgs: []string{"-c:a", "flac", "-compression_level", "5"},
+}
+
+func (f audioFormat) encodeArgs() []string {
+	args := []string{"-vn", "-ac", "1", "-ar", "16000"}
+	return append(args, f.CodecArgs...)
+}
+
+// extractAudio encodes the input's audio track on ffmpeg's stdout into out,
+// so the non-chunked path can upload it without a round trip through disk.
+// The returned duration is read from ffmpeg's final progress line (0 if
+// absent), which saves a separate ffprobe run.
+func extractAudio(inputPath string, format audioFormat, out io.Writer) (float64, error) {
+	args := []string{"-y", "-stats", "-i", inputPath}
+	args = append(args, format.encodeArgs()...)
+	args = append(args, "-f", format.Muxer, "pipe:1")
+	cmd := exec.Command("ffmpeg", args...)
+	stderr := newTailBuffer()
+	cmd.Stdout = out
+	cmd.Stderr = stderr
+	if err := cmd.Run(); err != nil {
+		return 0, commandError("ffmpeg", err, stderr)
 	}
-	args = append(args, "-i", inputPath)
-	if accurate {
-		args = append(args, "-ss", fmt.Sprintf("%.3f", startSeconds))
+	return parseFFmpegTime(stderr.String()), nil
+}
+
+var ffmpegTimeRe = regexp.MustCompile(`time=(\d+):(\d{2}):(\d{2}(?:\.\d+)?)`)
+
+func parseFFmpegTime(output string) float64 {
+	matches := ffmpegTimeRe.FindAllStringSubmatch(output, -1)
+	if len(matches) == 0 {
+		return 0
 	}
+	last := matches[len(matches)-1]
+	hours, _ := strconv.Atoi(last[1])
+	minutes, _ := strconv.Atoi(last[2])
+	seconds, _ := strconv.ParseFloat(last[3], 64)
+	return float64(hours*3600+minutes*60) + seconds
+}
+
+// splitAudio decodes inputPath once with ffmpeg's segment muxer, writing
+// chunkSeconds-long audio chunks into outDir. The segment list is streamed over
+// stdout so onChunk is called as soon as each chunk file is complete.
+func splitAudio(ctx context.Context, inputPath, outDir string, chunkSeconds int, format audioFormat, onChunk func(audioChunk) error) error {
+	args := []string{"-y", "-i", inputPath}
+	args = append(args, format.encodeArgs()...)
 	args = append(
 		args,
-		"-t",
-		fmt.Sprintf("%.3f", durationSeconds),
-		"-vn",
-		"-ac",
-		"1",
-		"-ar",
-		"16000",
 		"-f",
-		"wav",
-		outputPath,
+		"segment",
+		"-segment_time",
+		strconv.Itoa(chunkSeconds),
+		"-segment_format",
+		format.Muxer,
+		"-reset_timestamps",
+		"1",
+		"-segment_list",
+		"pipe:1",
+		"-segment_list_type",
+		"csv",
+		filepath.Join(outDir, "chunk_%04d"+format.Ext),
 	)
-	return runCommand("ffmpeg", args...)
+	cmd := exec.CommandContext(ctx, "ffmpeg", args...)
+	stderr := newTailBuffer()
+	cmd.Stderr = stderr
+	stdout, err := cmd.StdoutPipe()
+	if err != nil {
+		return err
+	}
+	if err := cmd.Start(); err != nil {
+		return fmt.Errorf("ffmpeg failed: %s", err)
+	}
+
+	abort := func(err error) error {
+		cmd.Process.Kill()
+		cmd.Wait()
+		return err
+	}
+
+	reader := csv.NewReader(stdout)
+	reader.FieldsPerRecord = 3
+	origin := 0.0
+	for index := 0; ; index++ {
+		record, err := reader.Read()
+		if err == io.EOF {
+			break
+		}
+		if err != nil {
+			return abort(fmt.Errorf("failed to read segment list: %w", err))
+		}
+		start, err := strconv.ParseFloat(record[1], 64)
+		if err != nil {
+			return abort(fmt.Errorf("failed to parse segment list entry: %q", strings.Join(record, ",")))
+		}
+		if index == 0 {
+			origin = start
+		}
+		chunkPath := record[0]
+		if !filepath.IsAbs(chunkPath) {
+			chunkPath = filepath.Join(outDir, chunkPath)
+		}
+		chunk := audioChunk{
+			Index: index,
+			Start: start - origin,
+			Path:  chunkPath,
+		}
+		if err := onChunk(chunk); err != nil {
+			return abort(err)
+		}
+	}
+
+	if err := cmd.Wait(); err != nil {
+		if ctx.Err() != nil {
+			return ctx.Err()
+		}
+		return commandError("ffmpeg", err, stderr)
+	}
+	return nil
 }
 
 func audioDuration(path string) (float64, error) {
@@ -504,47 +908,33 @@ func audioDuration(path string) (float64, error) {
 	return duration, nil
 }
 
-func audioSize(path string) (int64, error) {
-	info, err := os.Stat(path)
-	if err != nil {
-		return 0, err
-	}
-	return info.Size(), nil
-}
-
-func chooseChunkSeconds(path string, defaultChunk int, maxAudioBytes int64) (int, error) {
-	duration, err := audioDuration(path)
-	if err != nil {
-		return defaultChunk, err
-	}
+// chooseChunkSeconds sizes auto-chunks so each one fills about
+// chunkFillRatio of maxAudioBytes at the audio's average bitrate. Compressed
+// audio varies in bitrate, so the headroom keeps denser stretches under the
+// limit. defaultChunk is only used when the bitrate cannot be estimated.
+func chooseChunkSeconds(duration float64, sizeBytes int64, defaultChunk int, maxAudioBytes int64) int {
 	if duration <= 0 {
-		return defaultChunk, nil
-	}
-	sizeBytes, err := audioSize(path)
-	if err != nil {
-		return defaultChunk, err
+		return defaultChunk
 	}
 	bytesPerSecond := float64(sizeBytes) / duration
 	if bytesPerSecond <= 0 {
-		return defaultChunk, nil
+		return defaultChunk
 	}
-	estimated := int(float64(maxAudioBytes) / bytesPerSecond)
+	estimated := int(float64(maxAudioBytes) * chunkFillRatio / bytesPerSecond)
 	if estimated <= 0 {
-		return defaultChunk, nil
+		return defaultChunk
 	}
 	if estimated < 30 {
-		return 30, nil
+		return 30
 	}
-	if estimated > defaultChunk {
-		return defaultChunk, nil
-	}
-	return estimated, nil
+	return estimated
 }
 
 func transcribeWithRetry(
 	ctx context.Context,
 	client *openAIClient,
-	audioPath, model, language string,
+	audio audioInput,
+	model, language string,
 	logf func(string, ...any),
 ) ([]Segment, error) {
 	var segments []Segment
@@ -559,7 +949,7 @@ func transcribeWithRetry(
 			logf("Transcription failed; retrying in %.1fs (attempt %d). %s", delay.Seconds(), attempt, describeError(err))
 		},
 		func() error {
-			segments, err = client.Transcribe(ctx, audioPath, model, language)
+			segments, err = client.Transcribe(ctx, audio, model, language)
 			return err
 		},
 	)
@@ -569,49 +959,274 @@ func transcribeWithRetry(
 	return segments, nil
 }
 
+// jobGroup runs one goroutine per job with at most limit in flight, cancelling
+// the shared context on the first error.
+type jobGroup struct {
+	ctx    context.Context
+	cancel context.CancelFunc
+	sem    chan struct{}
+	wg     sync.WaitGroup
+	errCh  chan error
+}
+
+func newJobGroup(ctx context.Context, limit int) (*jobGroup, context.Context) {
+	if limit <= 0 {
+		limit = 1
+	}
+	ctx, cancel := context.WithCancel(ctx)
+	g := &jobGroup{
+		ctx:    ctx,
+		cancel: cancel,
+		sem:    make(chan struct{}, limit),
+		errCh:  make(chan error, 1),
+	}
+	return g, ctx
+}
+
+// Go blocks until a slot is free, then runs fn in its own goroutine. It
+// returns the context error without running fn if the group was cancelled.
+// fn should pass its ctx to retry so backoff waits release the slot.
+func (g *jobGroup) Go(fn func(ctx context.Context) error) error {
+	select {
+	case <-g.ctx.Done():
+		return g.ctx.Err()
+	case g.sem <- struct{}{}:
+	}
+	g.wg.Add(1)
+	go func() {
+		defer g.wg.Done()
+		defer func() { <-g.sem }()
+		if err := fn(context.WithValue(g.ctx, jobSlotKey{}, g.sem)); err != nil {
+			select {
+			case g.errCh <- err:
+			default:
+			}
+			g.cancel()
+		}
+	}()
+	return nil
+}
+
+// Wait waits for every started job and returns the first error, if any.
+func (g *jobGroup) Wait() error {
+	g.wg.Wait()
+	g.cancel()
+	select {
+	case err := <-g.errCh:
+		return err
+	default:
+		return nil
+	}
+}
+
+type audioChunk struct {
+	Index int
+	Start float64
+	Path  string
+}
+
+// checkpointHeader identifies the job a progress file belongs to. A file
+// whose header does not match the current run is discarded.
+type checkpointHeader struct {
+	Input        string `json:"input"`
+	Size         int64  `json:"size"`
+	ModTime      int64  `json:"mtime"`
+	Source       string `json:"source"`
+	ChunkSeconds int    `json:"chunk_seconds"`
+	Format       string `json:"format"`
+	Model        string `json:"model"`
+	Language     string `json:"language"`
+}
+
+type checkpointEntry struct {
+	Index    int                    `json:"idx"`
+	Offset   float64                `json:"offset"`
+	Segments []transcriptionSegment `json:"segments"`
+}
+
+// checkpointOffsetTolerance is how far (in seconds) a recorded chunk offset
+// may drift from the current split before the entry is ignored.
+const checkpointOffsetTolerance = 0.05
+
+type checkpointChunk struct {
+	offset   float64
+	segments []Segment
+}
+
+// chunkCheckpoint is an append-only JSON-lines record of transcribed chunks,
+// so a rerun after a failure only transcribes the chunks that are missing.
+// A nil checkpoint records nothing.
+type chunkCheckpoint struct {
+	mu   sync.Mutex
+	file *os.File
+	done map[int]checkpointChunk
+}
+
+func openChunkCheckpoint(path string, header checkpointHeader) (*chunkCheckpoint, error) {
+	done := map[int]checkpointChunk{}
+	resume := false
+	if data, err := os.ReadFile(path); err == nil {
+		lines := bytes.Split(data, []byte("\n"))
+		var existing checkpointHeader
+		// Everything after the last newline is a partial entry from a killed
+		// run; it is cut off below so new entries start on a fresh line.
+		complete := int64(bytes.LastIndexByte(data, '\n') + 1)
+		if complete > 0 && json.Unmarshal(lines[0], &existing) == nil && existing == header {
+			if err := os.Truncate(path, complete); err != nil {
+				return nil, err
+			}
+			resume = true
+			for _, line := range lines[1:] {
+				var entry checkpointEntry
+				if json.Unmarshal(line, &entry) != nil {
+					continue
+				}
+				segments := make([]Segment, 0, len(entry.Segments))
+				for _, seg := range entry.Segments {
+					segments = append(segments, Segment{Start: seg.Start, End: seg.End, Text: seg.Text})
+				}
+				done[entry.Index] = checkpointChunk{offset: entry.Offset, segments: segments}
+			}
+		}
+	}
+
+	flags := os.O_WRONLY | os.O_CREATE | os.O_TRUNC
+	if resume {
+		flags = os.O_WRONLY | os.O_APPEND
+	}
+	file, err := os.OpenFile(path, flags, 0644)
+	if err != nil {
+		return nil, err
+	}
+	if !resume {
+		line, err := json.Marshal(header)
+		if err == nil {
+			_, err = file.Write(append(line, '\n'))
+		}
+		if err != nil {
+			file.Close()
+			return nil, err
+		}
+	}
+	return &chunkCheckpoint{file: file, done: done}, nil
+}
+
+func (c *chunkCheckpoint) Completed() int {
+	if c == nil {
+		return 0
+	}
+	return len(c.done)
+}
+
+// Lookup returns the recorded segments for chunk. An entry whose offset does
+// not match the chunk's start was cut at different boundaries and is ignored.
+func (c *chunkCheckpoint) Lookup(chunk audioChunk) ([]Segment, bool) {
+	if c == nil {
+		return nil, false
+	}
+	done, ok := c.done[chunk.Index]
+	if !ok || math.Abs(done.offset-chunk.Start) > checkpointOffsetTolerance {
+		return nil, false
+	}
+	return done.segments, true
+}
+
+func (c *chunkCheckpoint) Record(chunk audioChunk, segments []Segment) error {
+	if c == nil {
+		return nil
+	}
+	entry := checkpointEntry{Index: chunk.Index, Offset: chunk.Start, Segments: make([]transcriptionSegment, 0, len(segments))}
+	for _, seg := range segments {
+		entry.Segments = append(entry.Segments, transcriptionSegment{Start: seg.Start, End: seg.End, Text: seg.Text})
+	}
+	line, err := json.Marshal(entry)
+	if err != nil {
+		return err
+	}
+	c.mu.Lock()
+	defer c.mu.Unlock()
+	_, err = c.file.Write(append(line, '\n'))
+	return err
+}
+
+func (c *chunkCheckpoint) Close() error {
+	if c == nil {
+		return nil
+	}
+	return c.file.Close()
+}
+
 func transcribeInChunks(
 	ctx context.Context,
 	client *openAIClient,
-	audioPath, model, language string,
+	inputPath, chunkDir, model, language string,
 	chunkSeconds int,
-	accurate bool,
+	format audioFormat,
+	workers int,
+	checkpoint *chunkCheckpoint,
 	logf func(string, ...any),
 ) ([]Segment, error) {
-	duration, err := audioDuration(audioPath)
-	if err != nil {
+	if err := os.MkdirAll(chunkDir, 0755); err != nil {
 		return nil, err
 	}
-	if duration <= 0 {
-		return nil, errors.New("audio duration is zero")
+	if completed := checkpoint.Completed(); completed > 0 {
+		logf("Resuming: %d chunks already transcribed.", completed)
 	}
 
-	segments := []Segment{}
-	current := 0.0
-	chunkIndex := 0
-	baseDir := filepath.Dir(audioPath)
-
-	for current < duration-0.01 {
-		remaining := duration - current
-		segmentDuration := float64(chunkSeconds)
-		if remaining < segmentDuration {
-			segmentDuration = remaining
-		}
-		chunkPath := filepath.Join(baseDir, fmt.Sprintf("chunk_%04d.wav", chunkIndex))
-		logf("Transcribing chunk %d at %.1fs...", chunkIndex+1, current)
-		if err := extractAudioSegment(audioPath, chunkPath, current, segmentDuration, accurate); err != nil {
-			return nil, err
+	// ffmpeg hands over each chunk as soon as it is written, so uploads start
+	// while the rest of the input is still being decoded.
+	group, ctx := newJobGroup(ctx, workers)
+
+	var resultsMu sync.Mutex
+	results := map[int][]Segment{}
+	chunks := []audioChunk{}
+
+	splitErr := splitAudio(ctx, inputPath, chunkDir, chunkSeconds, format, func(chunk audioChunk) error {
+		chunks = append(chunks, chunk)
+		if chunkSegments, ok := checkpoint.Lookup(chunk); ok {
+			os.Remove(chunk.Path)
+			resultsMu.Lock()
+			results[chunk.Index] = chunkSegments
+			resultsMu.Unlock()
+			return nil
 		}
-		chunkSegments, err := transcribeWithRetry(ctx, client, chunkPath, model, language, logf)
+		err := group.Go(func(ctx context.Context) error {
+			defer os.Remove(chunk.Path)
+			logf("Transcribing chunk %d at %.1fs...", chunk.Index+1, chunk.Start)
+			chunkSegments, err := transcribeWithRetry(ctx, client, audioFile(chunk.Path), model, language, logf)
+			if err != nil {
+				return err
+			}
+			if err := checkpoint.Record(chunk, chunkSegments); err != nil {
+				logf("Failed to record checkpoint for chunk %d: %v", chunk.Index+1, err)
+			}
+			resultsMu.Lock()
+			results[chunk.Index] = chunkSegments
+			resultsMu.Unlock()
+			return nil
+		})
 		if err != nil {
-			return nil, err
+			os.Remove(chunk.Path)
 		}
-		for _, seg := range chunkSegments {
-			seg.Start += current
-			seg.End += current
+		return err
+	})
+	if err := group.Wait(); err != nil {
+		return nil, err
+	}
+	if splitErr != nil {
+		return nil, splitErr
+	}
+	if len(chunks) == 0 {
+		return nil, errors.New("audio produced no chunks")
+	}
+
+	segments := []Segment{}
+	for _, chunk := range chunks {
+		for _, seg := range results[chunk.Index] {
+			seg.Start += chunk.Start
+			seg.End += chunk.Start
 			segments = append(segments, seg)
 		}
-		current += segmentDuration
-		chunkIndex++
 	}
 	return segments, nil
 }
@@ -622,87 +1237,163 @@ func translateSegments(
 	segments []Segment,
 	sourceLang, targetLang, model string,
 	workers int,
+	batchSize int,
 	minTranslateChars int,
+	limiter *tokenBucket,
 	logf func(string, ...any),
 ) ([]Segment, error) {
-	if workers <= 0 {
-		workers = 1
+	if batchSize <= 0 {
+		batchSize = 1
 	}
 	translated := make([]Segment, len(segments))
 	copy(translated, segments)
 
-	ctx, cancel := context.WithCancel(ctx)
-	defer cancel()
-
-	jobs := make(chan int)
-	var wg sync.WaitGroup
-	errCh := make(chan error, 1)
-
-	workerFn := func() {
-		defer wg.Done()
-		for idx := range jobs {
-			if ctx.Err() != nil {
-				return
-			}
-			text := strings.TrimSpace(translated[idx].Text)
-			if text == "" {
-				continue
+	// Repeated lines (speaker labels, sound effects, refrains) are translated
+	// once and the result is copied to the other occurrences.
+	pending := []int{}
+	firstByText := map[string]int{}
+	duplicates := map[int][]int{}
+	for idx, seg := range segments {
+		if !needsTranslation(seg.Text, minTranslateChars, sourceLang, targetLang) {
+			continue
+		}
+		text := seg.Text
+		if first, ok := firstByText[text]; ok {
+			duplicates[first] = append(duplicates[first], idx)
+			continue
+		}
+		firstByText[text] = idx
+		pending = append(pending, idx)
+	}
+	batches := [][]int{}
+	for start := 0; start < len(pending); start += batchSize {
+		end := start + batchSize
+		if end > len(pending) {
+			end = len(pending)
+		}
+		batches = append(batches, pending[start:end])
+	}
+
+	group, ctx := newJobGroup(ctx, workers)
+
+	withRetry := func(ctx context.Context, fn func() error) error {
+		return retry(
+			ctx,
+			maxRetries,
+			baseRetryDelay,
+			maxRetryDelay,
+			isRetryable,
+			func(attempt int, delay time.Duration, err error) {
+				logf("Translation failed; retrying in %.1fs (attempt %d). %s", delay.Seconds(), attempt, describeError(err))
+			},
+			fn,
+		)
+	}
+
+	translateOne := func(ctx context.Context, idx int) error {
+		text := translated[idx].Text
+		var output string
+		err := withRetry(ctx, func() error {
+			if err := limiter.Wait(ctx, estimateTokens(text)); err != nil {
+				return err
 			}
-			if isLowInfoText(text, minTranslateChars) {
-				continue
+			var err error
+			output, err = client.Translate(ctx, model, sourceLang, targetLang, text)
+			return err
+		})
+		if err != nil {
+			return err
+		}
+		translated[idx].Text = output
+		return nil
+	}
+
+	translateBatch := func(ctx context.Context, batch []int) error {
+		if len(batch) == 1 {
+			return translateOne(ctx, batch[0])
+		}
+		texts := make([]string, len(batch))
+		for i, idx := range batch {
+			texts[i] = translated[idx].Text
+		}
+		var outputs []string
+		err := withRetry(ctx, func() error {
+			if err := limiter.Wait(ctx, estimateTokens(texts...)); err != nil {
+				return err
 			}
-			var output string
-			err := retry(
-				ctx,
-				maxRetries,
-				baseRetryDelay,
-				maxRetryDelay,
-				isRetryable,
-				func(attempt int, delay time.Duration, err error) {
-					logf("Translation failed; retrying in %.1fs (attempt %d). %s", delay.Seconds(), attempt, describeError(err))
-				},
-				func() error {
-					var err error
-					output, err = client.Translate(ctx, model, sourceLang, targetLang, text)
+			var err error
+			outputs, err = client.TranslateBatch(ctx, model, sourceLang, targetLang, texts)
+			return err
+		})
+		if errors.Is(err, errBatchMismatch) {
+			logf("Batch translation returned mismatched lines; translating %d segments individually.", len(batch))
+			for _, idx := range batch {
+				if err := translateOne(ctx, idx); err != nil {
 					return err
-				},
-			)
-			if err != nil {
-				select {
-				case errCh <- err:
-				default:
 				}
-				cancel()
-				return
 			}
-			translated[idx].Text = output
+			return nil
 		}
+		if err != nil {
+			return err
+		}
+		for i, idx := range batch {
+			translated[idx].Text = outputs[i]
+		}
+		return nil
 	}
 
-	for i := 0; i < workers; i++ {
-		wg.Add(1)
-		go workerFn()
-	}
-
-sendLoop:
-	for i := range segments {
-		select {
-		case <-ctx.Done():
-			break sendLoop
-		case jobs <- i:
+	for _, batch := range batches {
+		batch := batch
+		if err := group.Go(func(ctx context.Context) error { return translateBatch(ctx, batch) }); err != nil {
+			break
 		}
 	}
-	close(jobs)
-	wg.Wait()
-
-	select {
-	case err := <-errCh:
+	if err := group.Wait(); err != nil {
 		return nil, err
-	default:
+	}
+	for first, others := range duplicates {
+		for _, idx := range others {
+			translated[idx].Text = translated[first].Text
+		}
 	}
 	return translated, nil
 }
 
+// linkOrCopyFile hardlinks src to dst when both live on the same filesystem
+// and falls back to a byte copy otherwise.
+func linkOrCopyFile(src, dst string) error {
+	if err := os.Link(src, dst); err == nil {
+		return nil
+	}
+	return copyFile(src, dst)
+}
+
+// keptAudioPath returns where --keep-audio writes the extracted audio. It is
+// the input path with ext swapped in, unless that would name the input file
+// itself (e.g. talk.flac with FLAC output), in which case ".audio" is inserted
+// before the extension so the original is never overwritten.
+func keptAudioPath(inputPath, ext string) string {
+	stem := strings.TrimSuffix(inputPath, filepath.Ext(inputPath))
+	kept := stem + ext
+	if kept == inputPath || sameFile(kept, inputPath) {
+		kept = stem + ".audio" + ext
+	}
+	return kept
+}
+
+func sameFile(a, b string) bool {
+	infoA, err := os.Stat(a)
+	if err != nil {
+		return false
+	}
+	infoB, err := os.Stat(b)
+	if err != nil {
+		return false
+	}
+	return os.SameFile(infoA, infoB)
+}
+
 func copyFile(src, dst string) error {
 	input, err := os.Open(src)
 	if err != nil {
@@ -735,12 +1426,16 @@ func run() int {
 	translateModel := flag.String("translate-model", defaultTranslateModel, "Translation model")
 	noTranslate := flag.Bool("no-translate", false, "Skip translation and output original transcript")
 	chunkSeconds := flag.Int("chunk-seconds", 0, "Split audio into chunks of N seconds before transcription")
-	maxAudioMB := flag.Int("max-audio-mb", defaultMaxAudioMB, "Auto-chunk when extracted audio exceeds this size (MB)")
+	maxAudioMB := flag.Int("max-audio-mb", defaultMaxAudioMB, "Auto-chunk when extracted audio exceeds this size (MB, capped at the 25 MB Whisper limit; 0 always chunks)")
 	keepAudio := flag.Bool("keep-audio", false, "Keep the extracted audio file")
+	lossless := flag.Bool("lossless", false, "Extract lossless FLAC instead of compact Opus (larger uploads)")
+	transcribeWorkers := flag.Int("transcribe-workers", defaultTranscribeWorkers, "Number of concurrent chunk transcription workers")
 	translateWorkers := flag.Int("translate-workers", defaultTranslateWorkers, "Number of concurrent translation workers")
-	minTranslateChars := flag.Int("min-translate-chars", 4, "Skip translation for segments with fewer than N letters/numbers (0 to disable)")
+	translateBatchSize := flag.Int("translate-batch-size", defaultTranslateBatch, "Number of segments sent per translation request (1 to disable batching)")
+	translateTPM := flag.Int("translate-tpm", 0, "Throttle translation to roughly N tokens per minute (0 to disable)")
+	minTranslateChars := flag.Int("min-translate-chars", 4, "Skip translation for segments with fewer than N letters/numbers (0 translates every segment)")
 	timeoutSeconds := flag.Int("timeout-seconds", defaultTimeoutSeconds, "HTTP timeout for OpenAI requests (seconds)")
-	highAccuracy := flag.Bool("high-accuracy", false, "Use higher-accuracy transcription settings (slower)")
+	highAccuracy := flag.Bool("high-accuracy", false, "Translate every segment, including short low-info ones (slower)")
 	flag.Parse()
 
 	if flag.NArg() < 1 {
@@ -793,63 +1488,135 @@ func run() int {
 	}
 	defer os.RemoveAll(tmpDir)
 
-	audioPath := filepath.Join(tmpDir, "audio.wav")
-	logf("Extracting audio...")
-	if err := extractAudio(inputPath, audioPath); err != nil {
-		fmt.Fprintln(os.Stderr, err)
-		return 1
-	}
-
-	audioSizeBytes, err := audioSize(audioPath)
-	if err != nil {
-		fmt.Fprintf(os.Stderr, "Failed to read extracted audio: %v\n", err)
-		return 1
-	}
-	if audioSizeBytes < 1024 {
-		fmt.Fprintln(os.Stderr, "Extracted audio is empty or too small.")
-		return 1
-	}
-
 	if *highAccuracy {
 		*minTranslateChars = 0
 	}
 
-	maxAudioBytes := int64(*maxAudioMB) * 1024 * 1024
-	useChunking := *chunkSeconds > 0 || audioSizeBytes > maxAudioBytes
-	chunkSecondsValue := *chunkSeconds
+	format := opusFormat
+	if *lossless {
+		format = flacFormat
+	}
+	audioPath := filepath.Join(tmpDir, "audio"+format.Ext)
+	chunkDir := filepath.Join(tmpDir, "chunks")
+	var segments []Segment
 
-	if useChunking {
-		if _, err := exec.LookPath("ffprobe"); err != nil {
-			fmt.Fprintln(os.Stderr, "ffprobe is required for chunked transcription.")
-			return 1
+	// The extracted audio stays in memory unless it is too large to upload
+	// whole, or chunking or --keep-audio needs it as a file.
+	var audioData []byte
+	audioOnDisk := false
+	writeAudio := func() error {
+		if audioOnDisk {
+			return nil
 		}
-	}
-	if *chunkSeconds <= 0 && audioSizeBytes > maxAudioBytes {
-		chunkSecondsValue, err = chooseChunkSeconds(audioPath, defaultChunkSeconds, maxAudioBytes)
+		if err := os.WriteFile(audioPath, audioData, 0644); err != nil {
+			return err
+		}
+		audioData = nil
+		audioOnDisk = true
+		return nil
+	}
+
+	// Chunked runs record progress next to the output, so a rerun of the
+	// same input after a failure skips chunks that were already transcribed.
+	checkpointPath := outputPath + ".progress.jsonl"
+	transcribeChunked := func(source string, chunkSecondsValue int) ([]Segment, error) {
+		// Chunks cut from the input and from the extracted audio need not
+		// line up, so the header records which one was split.
+		sourceKind := "extracted"
+		if source == inputPath {
+			sourceKind = "input"
+		}
+		header := checkpointHeader{
+			Input:        inputPath,
+			Size:         info.Size(),
+			ModTime:      info.ModTime().UnixNano(),
+			Source:       sourceKind,
+			ChunkSeconds: chunkSecondsValue,
+			Format:       format.Ext,
+			Model:        *whisperModel,
+			Language:     *sourceLang,
+		}
+		checkpoint, err := openChunkCheckpoint(checkpointPath, header)
 		if err != nil {
-			logf("Failed to calculate chunk size; using default %ds.", defaultChunkSeconds)
-			chunkSecondsValue = defaultChunkSeconds
+			logf("Checkpointing disabled: %v", err)
+		}
+		defer checkpoint.Close()
+		return transcribeInChunks(ctx, client, source, chunkDir, *whisperModel, *sourceLang, chunkSecondsValue, format, *transcribeWorkers, checkpoint, logf)
+	}
+
+	if *chunkSeconds > 0 && !*keepAudio {
+		// Forced chunking needs no full-length extraction: split straight from the input.
+		logf("Chunking audio into %ds segments.", *chunkSeconds)
+		logf("Transcribing with Whisper...")
+		segments, err = transcribeChunked(inputPath, *chunkSeconds)
+	} else {
+		// Never attempt an upload the Whisper API is known to reject.
+		maxAudioBytes := int64(*maxAudioMB) * 1024 * 1024
+		if maxAudioBytes > whisperUploadLimitBytes {
+			maxAudioBytes = whisperUploadLimitBytes
 		}
-		logf("Audio is large (%.1f MB); auto-chunking with %ds segments.", float64(audioSizeBytes)/(1024*1024), chunkSecondsValue)
-	} else if *chunkSeconds > 0 {
-		logf("Chunking audio into %ds segments.", chunkSecondsValue)
-	}
 
-	logf("Transcribing with Whisper...")
-	segments, err := func() ([]Segment, error) {
-		if useChunking {
-			return transcribeInChunks(ctx, client, audioPath, *whisperModel, *sourceLang, chunkSecondsValue, *highAccuracy, logf)
+		logf("Extracting audio...")
+		spool := &spoolWriter{limit: maxAudioBytes, path: audioPath}
+		var extractedDuration float64
+		extractedDuration, err = extractAudio(inputPath, format, spool)
+		if errClose := spool.Close(); err == nil {
+			err = errClose
 		}
-		return transcribeWithRetry(ctx, client, audioPath, *whisperModel, *sourceLang, logf)
-	}()
-	if err != nil {
-		if !useChunking && shouldFallbackToChunking(err) {
-			if _, errProbe := exec.LookPath("ffprobe"); errProbe != nil {
-				fmt.Fprintln(os.Stderr, "ffprobe is required for chunked transcription.")
+		if err != nil {
+			fmt.Fprintln(os.Stderr, err)
+			return 1
+		}
+		if spool.OnDisk() {
+			audioOnDisk = true
+		} else {
+			audioData = spool.buf.Bytes()
+		}
+
+		audioSizeBytes := spool.size
+		if audioSizeBytes < 1024 {
+			fmt.Fprintln(os.Stderr, "Extracted audio is empty or too small.")
+			return 1
+		}
+
+		useChunking := *chunkSeconds > 0 || audioSizeBytes > maxAudioBytes
+		chunkSecondsValue := *chunkSeconds
+
+		if useChunking {
+			if err := writeAudio(); err != nil {
+				fmt.Fprintf(os.Stderr, "Failed to write extracted audio: %v\n", err)
 				return 1
 			}
-			logf("Whisper request failed; retrying in chunks. Chunk size: %ds.", defaultChunkSeconds)
-			segments, err = transcribeInChunks(ctx, client, audioPath, *whisperModel, *sourceLang, defaultChunkSeconds, *highAccuracy, logf)
+		}
+		if *chunkSeconds <= 0 && audioSizeBytes > maxAudioBytes {
+			duration := extractedDuration
+			if duration <= 0 {
+				if _, errProbe := exec.LookPath("ffprobe"); errProbe == nil {
+					duration, _ = audioDuration(audioPath)
+				}
+			}
+			if duration <= 0 {
+				logf("Failed to calculate chunk size; using default %ds.", defaultChunkSeconds)
+			}
+			chunkSecondsValue = chooseChunkSeconds(duration, audioSizeBytes, defaultChunkSeconds, maxAudioBytes)
+			logf("Audio is large (%.1f MB); auto-chunking with %ds segments.", float64(audioSizeBytes)/(1024*1024), chunkSecondsValue)
+		} else if *chunkSeconds > 0 {
+			logf("Chunking audio into %ds segments.", chunkSecondsValue)
+		}
+
+		logf("Transcribing with Whisper...")
+		if useChunking {
+			segments, err = transcribeChunked(audioPath, chunkSecondsValue)
+		} else {
+			segments, err = transcribeWithRetry(ctx, client, audioInput{Name: "audio" + format.Ext, Data: audioData}, *whisperModel, *sourceLang, logf)
+			if err != nil && shouldFallbackToChunking(err) {
+				if errWrite := writeAudio(); errWrite != nil {
+					fmt.Fprintf(os.Stderr, "Failed to write extracted audio: %v\n", errWrite)
+					return 1
+				}
+				logf("Whisper request failed; retrying in chunks. Chunk size: %ds.", defaultChunkSeconds)
+				segments, err = transcribeChunked(audioPath, defaultChunkSeconds)
+			}
 		}
 	}
 	if err != nil {
@@ -862,12 +1629,12 @@ func run() int {
 		if workers <= 0 {
 			workers = runtime.NumCPU()
 		}
-		translatable := countTranslatableSegments(segments, *minTranslateChars)
+		translatable := countTranslatableSegments(segments, *minTranslateChars, *sourceLang, *targetLang)
 		if translatable == 0 {
-			logf("Skipping translation: segments are low-info.")
+			logf("Skipping translation: segments are low-info or already in the target language.")
 		} else {
 			logf("Translating segments (%d of %d segments, %d workers)...", translatable, len(segments), workers)
-			translated, err := translateSegments(ctx, client, segments, *sourceLang, *targetLang, *translateModel, workers, *minTranslateChars, logf)
+			translated, err := translateSegments(ctx, client, segments, *sourceLang, *targetLang, *translateModel, workers, *translateBatchSize, *minTranslateChars, newTokenBucket(*translateTPM), logf)
 			if err != nil {
 				fmt.Fprintf(os.Stderr, "Translation failed: %v\n", err)
 				return 1
@@ -881,10 +1648,17 @@ func run() int {
 		fmt.Fprintf(os.Stderr, "Failed to write SRT: %v\n", err)
 		return 1
 	}
+	os.Remove(checkpointPath)
 
 	if *keepAudio {
-		kept := strings.TrimSuffix(inputPath, filepath.Ext(inputPath)) + ".wav"
-		if err := copyFile(audioPath, kept); err != nil {
+		kept := keptAudioPath(inputPath, format.Ext)
+		keep := func() error {
+			if audioOnDisk {
+				return linkOrCopyFile(audioPath, kept)
+			}
+			return os.WriteFile(kept, audioData, 0644)
+		}
+		if err := keep(); err != nil {
 			fmt.Fprintf(os.Stderr, "Failed to keep audio: %v\n", err)
 			return 1
 		}
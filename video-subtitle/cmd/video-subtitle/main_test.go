@@ -0,0 +1,170 @@
+package main
+
+import (
+	"errors"
+	"os"
+	"path/filepath"
+	"reflect"
+	"testing"
+)
+
+func TestParseNumberedLines(t *testing.T) {
+	tests := []struct {
+		name    string
+		content string
+		count   int
+		want    []string
+		wantErr error
+	}{
+		{
+			name:    "plain",
+			content: "1. one\n2. two\n",
+			count:   2,
+			want:    []string{"one", "two"},
+		},
+		{
+			name:    "crlf",
+			content: "1. one\r\n2. two\r\n",
+			count:   2,
+			want:    []string{"one", "two"},
+		},
+		{
+			name:    "blank line",
+			content: "1. one\n2. \n",
+			count:   2,
+			wantErr: errBatchMismatch,
+		},
+		{
+			name:    "blank line does not borrow the next one",
+			content: "1. \n2. two\n",
+			count:   2,
+			wantErr: errBatchMismatch,
+		},
+		{
+			name:    "out of order",
+			content: "2. two\n1. one\n",
+			count:   2,
+			want:    []string{"one", "two"},
+		},
+		{
+			name:    "duplicate number",
+			content: "1. one\n1. uno\n",
+			count:   2,
+			wantErr: errBatchMismatch,
+		},
+		{
+			name:    "number out of range",
+			content: "1. one\n3. three\n",
+			count:   2,
+			wantErr: errBatchMismatch,
+		},
+		{
+			name:    "preamble",
+			content: "Here are the translations:\n1. one\n2. two",
+			count:   2,
+			want:    []string{"one", "two"},
+		},
+		{
+			name:    "missing line",
+			content: "1. one\n",
+			count:   2,
+			wantErr: errBatchMismatch,
+		},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			got, err := parseNumberedLines(tt.content, tt.count)
+			if !errors.Is(err, tt.wantErr) {
+				t.Fatalf("err = %v, want %v", err, tt.wantErr)
+			}
+			if !reflect.DeepEqual(got, tt.want) {
+				t.Fatalf("got %q, want %q", got, tt.want)
+			}
+		})
+	}
+}
+
+func TestOpenChunkCheckpoint(t *testing.T) {
+	header := checkpointHeader{Input: "talk.mp4", Size: 1, Source: "input", ChunkSeconds: 600}
+	chunk0 := audioChunk{Index: 0, Start: 0}
+	chunk1 := audioChunk{Index: 1, Start: 600}
+	chunk2 := audioChunk{Index: 2, Start: 1200}
+	segments := []Segment{{Start: 1, End: 2, Text: "hello"}}
+
+	record := func(t *testing.T, path string, header checkpointHeader, chunks ...audioChunk) {
+		t.Helper()
+		checkpoint, err := openChunkCheckpoint(path, header)
+		if err != nil {
+			t.Fatal(err)
+		}
+		defer checkpoint.Close()
+		for _, chunk := range chunks {
+			if err := checkpoint.Record(chunk, segments); err != nil {
+				t.Fatal(err)
+			}
+		}
+	}
+	reopen := func(t *testing.T, path string, header checkpointHeader) *chunkCheckpoint {
+		t.Helper()
+		checkpoint, err := openChunkCheckpoint(path, header)
+		if err != nil {
+			t.Fatal(err)
+		}
+		t.Cleanup(func() { checkpoint.Close() })
+		return checkpoint
+	}
+
+	t.Run("partial trailing line", func(t *testing.T) {
+		path := filepath.Join(t.TempDir(), "progress.jsonl")
+		record(t, path, header, chunk0)
+		file, err := os.OpenFile(path, os.O_WRONLY|os.O_APPEND, 0)
+		if err != nil {
+			t.Fatal(err)
+		}
+		file.WriteString(`{"idx":1,"off`)
+		file.Close()
+
+		record(t, path, header, chunk2)
+		checkpoint := reopen(t, path, header)
+		if got := checkpoint.Completed(); got != 2 {
+			t.Fatalf("Completed() = %d, want 2", got)
+		}
+		if _, ok := checkpoint.Lookup(chunk1); ok {
+			t.Fatal("partial entry for chunk 1 was resumed")
+		}
+		if got, ok := checkpoint.Lookup(chunk2); !ok || !reflect.DeepEqual(got, segments) {
+			t.Fatalf("Lookup(chunk2) = %v, %v", got, ok)
+		}
+	})
+
+	t.Run("header mismatch", func(t *testing.T) {
+		path := filepath.Join(t.TempDir(), "progress.jsonl")
+		record(t, path, header, chunk0)
+		other := header
+		other.Source = "extracted"
+		if got := reopen(t, path, other).Completed(); got != 0 {
+			t.Fatalf("Completed() = %d, want 0", got)
+		}
+	})
+
+	t.Run("offset mismatch", func(t *testing.T) {
+		path := filepath.Join(t.TempDir(), "progress.jsonl")
+		record(t, path, header, chunk1)
+		moved := chunk1
+		moved.Start = 598
+		if _, ok := reopen(t, path, header).Lookup(moved); ok {
+			t.Fatal("entry with a different offset was resumed")
+		}
+	})
+
+	t.Run("empty file", func(t *testing.T) {
+		path := filepath.Join(t.TempDir(), "progress.jsonl")
+		if err := os.WriteFile(path, nil, 0644); err != nil {
+			t.Fatal(err)
+		}
+		record(t, path, header, chunk0)
+		if got := reopen(t, path, header).Completed(); got != 1 {
+			t.Fatalf("Completed() = %d, want 1", got)
+		}
+	})
+}